@@ -1,14 +1,20 @@
 from fastapi import FastAPI, HTTPException, Response, Depends, status, Request, Form
-from fastapi.responses import StreamingResponse, HTMLResponse, RedirectResponse, FileResponse
+from fastapi.responses import StreamingResponse, HTMLResponse, RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
-from sqlalchemy import create_engine, Column, Integer, String, DateTime
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event, select, update, delete, bindparam, Column, Integer, String, DateTime
+from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 import yaml
-import requests
+import httpx
 import secrets
+import hashlib
+import hmac
+import base64
+import struct
+import time
 import datetime
 from datetime import timezone
 import uvicorn
@@ -17,15 +23,47 @@ from passlib.context import CryptContext
 from datetime import timedelta
 import logging
 from enum import Enum
+from functools import lru_cache
+import html
+import string
+import gzip
+from typing import NamedTuple
+from collections import Counter
+import asyncio
+from cachetools import TTLCache
 import os
+import tempfile
 from pathlib import Path
+from contextlib import asynccontextmanager
 
 # Set up logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Application lifecycle: shared upstream HTTP client and background tasks. It only runs once
+# the server starts, after the whole module has loaded, so it can use the helpers defined below.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A multi-worker launch prepares the schema once in __main__ so workers don't race on it
+    if not os.environ.get("KINPEEK_DB_READY"):
+        init_db()
+    app.state.http = httpx.AsyncClient(
+        timeout=httpx.Timeout(None, connect=10.0),
+        limits=httpx.Limits(max_keepalive_connections=64, max_connections=256, keepalive_expiry=60),
+    )
+    load_manifest_cache()
+    app.state.hit_flush_task = asyncio.create_task(hit_flush_loop())
+    app.state.purge_task = asyncio.create_task(purge_loop())
+    try:
+        yield
+    finally:
+        app.state.purge_task.cancel()
+        app.state.hit_flush_task.cancel()
+        await drain_hit_buffer()
+        await app.state.http.aclose()
+
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -39,12 +77,17 @@ app.add_middleware(
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Load configuration
+# Load configuration, using the LibYAML parser when PyYAML was built with it
 try:
-    with open("config.yaml", "r") as config_file:
-        config = yaml.safe_load(config_file)
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+try:
+    with open("config.yaml", "rb") as config_file:
+        config = yaml.load(config_file, Loader=YamlLoader)
 except Exception as e:
-    logger.error(f"Failed to load config.yaml: {e}")
+    logger.error("Failed to load config.yaml: %s", e)
     raise
 
 KINPEEK_HOST = config['kinpeek']['host']
@@ -57,35 +100,116 @@ ADMIN_USERNAME = config['kinpeek']['admin_username']
 ADMIN_PASSWORD = config['kinpeek']['admin_password']
 DEFAULT_RESOLUTION = config['kinpeek'].get('default_resolution', 'MEDIUM')
 SHARE_ID_LENGTH = config['kinpeek'].get('share_id_length', 8)
+KINPEEK_WORKERS = config['kinpeek'].get('workers', 1)
 
 # Directory for storing .m3u8 files
 SHARES_DIR = Path("static/shares")
 SHARES_DIR.mkdir(exist_ok=True)
 
+# Timeout for Stash playlist and GraphQL calls; segment streams are not time-limited
+STASH_API_TIMEOUT = 30.0
+
+# Chunk size and read-ahead depth used when relaying segment bytes from Stash
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_PREFETCH_CHUNKS = 4
+
+# Upstream segment headers that are safe to relay to viewers
+SEGMENT_PASSTHROUGH_HEADERS = ("Content-Length", "Content-Range", "Content-Type", "ETag", "Last-Modified")
+# Upstream bodies below this size are read in one go instead of through the prefetch queue
+SMALL_BODY_SIZE = 8 * 1024
+
+def parse_content_length(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        length = int(value)
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+# Viewer request headers relayed to Stash so seeks and revalidations are answered upstream
+SEGMENT_FORWARD_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since")
+
 # JWT settings
-SECRET_KEY = secrets.token_urlsafe(32)
+# Worker processes inherit KINPEEK_SECRET_KEY from the launcher so tokens verify in every worker
+SECRET_KEY = os.environ.get("KINPEEK_SECRET_KEY") or secrets.token_urlsafe(32)
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow; run hashing and verification in a worker thread to keep the event loop free
+async def hash_password(password: str) -> str:
+    return await asyncio.to_thread(pwd_context.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
+
+# Hash the admin password on first use so imports and reloads don't pay the bcrypt cost
+@lru_cache(maxsize=1)
+def get_hashed_admin_password() -> str:
+    try:
+        hashed_password = pwd_context.hash(ADMIN_PASSWORD)
+        logger.info("Admin password hashed successfully")
+        return hashed_password
+    except Exception as e:
+        logger.error("Failed to hash admin password: %s", e)
+        raise
+
+def check_admin_password(password: str) -> bool:
+    return pwd_context.verify(password, get_hashed_admin_password())
+
+# Digests of admin passwords that verified recently, so repeat logins skip bcrypt
+_admin_password_cache: TTLCache = TTLCache(maxsize=4, ttl=300)
+
+async def verify_admin_password(password: str) -> bool:
+    key = hashlib.sha256(password.encode()).digest()
+    if _admin_password_cache.get(key):
+        return True
+    if not await asyncio.to_thread(check_admin_password, password):
+        return False
+    _admin_password_cache[key] = True
+    return True
+
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-try:
-    HASHED_ADMIN_PASSWORD = pwd_context.hash(ADMIN_PASSWORD)
-    logger.info("Admin password hashed successfully")
-except Exception as e:
-    logger.error(f"Failed to hash admin password: {e}")
-    raise
-
 # SQLite database setup
 DATABASE_URL = "sqlite:///shared_videos.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=10,
+    max_overflow=20,
+    pool_pre_ping=False,
+)
+
+# Tune every new SQLite connection: WAL lets share lookups proceed while hit counts are written
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # Only takes effect for a database created after this setting (or after a full VACUUM)
+    cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Database session dependency
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 # Resolution Enum
 class Resolution(str, Enum):
     LOW = "LOW"
@@ -99,12 +223,23 @@ class SharedVideo(Base):
     share_id = Column(String, unique=True, index=True)
     video_name = Column(String)
     stash_video_id = Column(Integer)
-    expires_at = Column(DateTime(timezone=True))
+    expires_at = Column(DateTime(timezone=True), index=True)
     hits = Column(Integer, default=0)
     resolution = Column(String, default=DEFAULT_RESOLUTION)
     password_hash = Column(String, nullable=True)
 
-Base.metadata.create_all(bind=engine)
+# Create the schema at startup rather than on import
+def init_db():
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes introduced after a database was created
+    for index in SharedVideo.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    # Refresh planner statistics so SQLite picks the share_id/expires_at indexes
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+# Share lookup built once at import; its compiled form is reused from the engine's statement cache
+_share_by_id_stmt = select(SharedVideo).where(SharedVideo.share_id == bindparam("sid"))
 
 # Pydantic models
 class ShareVideoRequest(BaseModel):
@@ -118,6 +253,116 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+class SharedVideoInfo(BaseModel):
+    share_id: str
+    video_name: str
+    stash_video_id: int
+    expires_at: datetime.datetime
+    hits: int
+    share_url: str
+    resolution: str
+    has_password: bool
+
+# Cached share lookups; snapshots of the immutable columns so hot paths skip SQLite
+class ShareInfo(NamedTuple):
+    video_name: str
+    stash_video_id: int
+    expires_at: float  # UTC epoch seconds, compared against time.time()
+    resolution: str
+    password_hash: str | None
+    # Stash segment URL around the segment name, built once per cache fill
+    segment_url_prefix: str
+    segment_url_query: str
+
+_share_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+def get_share(db: Session, share_id: str) -> ShareInfo | None:
+    info = _share_cache.get(share_id)
+    if info is None:
+        video = db.execute(_share_by_id_stmt, {"sid": share_id}).scalar_one_or_none()
+        if not video:
+            return None
+        info = ShareInfo(
+            video_name=video.video_name,
+            stash_video_id=video.stash_video_id,
+            expires_at=video.expires_at.replace(tzinfo=timezone.utc).timestamp(),
+            resolution=video.resolution,
+            password_hash=video.password_hash,
+            segment_url_prefix=f"{STASH_SERVER}/scene/{video.stash_video_id}/stream.m3u8/",
+            segment_url_query=f"?apikey={STASH_API_KEY}&resolution={video.resolution}",
+        )
+        _share_cache[share_id] = info
+    return info
+
+# Buffered hit counts, folded into the database every HIT_FLUSH_INTERVAL seconds
+HIT_FLUSH_INTERVAL = 5
+_hit_buffer: Counter = Counter()
+_hit_lock = asyncio.Lock()
+
+def flush_hits(pending: Counter):
+    stmt = (
+        update(SharedVideo)
+        .where(SharedVideo.share_id == bindparam("sid"))
+        .values(hits=SharedVideo.hits + bindparam("n"))
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt, [{"sid": sid, "n": n} for sid, n in pending.items()])
+
+async def drain_hit_buffer():
+    async with _hit_lock:
+        pending = _hit_buffer.copy()
+        _hit_buffer.clear()
+    if not pending:
+        return
+    try:
+        await asyncio.to_thread(flush_hits, pending)
+    except Exception as e:
+        logger.error("Failed to flush hit counts: %s", e)
+        async with _hit_lock:
+            _hit_buffer.update(pending)
+
+async def hit_flush_loop():
+    while True:
+        await asyncio.sleep(HIT_FLUSH_INTERVAL)
+        await drain_hit_buffer()
+
+# Expired shares are purged periodically so the table and its indexes stay small
+PURGE_INTERVAL = 3600
+PURGE_VACUUM_PAGES = 100
+
+def purge_expired_shares() -> list[str]:
+    now = datetime.datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        expired = db.execute(
+            delete(SharedVideo).where(SharedVideo.expires_at < now).returning(SharedVideo.share_id)
+        ).scalars().all()
+        db.commit()
+    if expired:
+        # Hand freed pages back to the filesystem without a full VACUUM. The pragma frees one page
+        # per step, and only executescript() runs it to completion through the sqlite3 driver.
+        raw_connection = engine.raw_connection()
+        try:
+            raw_connection.driver_connection.executescript(f"PRAGMA incremental_vacuum({PURGE_VACUUM_PAGES})")
+        finally:
+            raw_connection.close()
+    for share_id in expired:
+        (SHARES_DIR / f"{share_id}.m3u8").unlink(missing_ok=True)
+    return expired
+
+async def purge_loop():
+    while True:
+        try:
+            expired = await asyncio.to_thread(purge_expired_shares)
+            for share_id in expired:
+                _share_cache.pop(share_id, None)
+                _manifest_cache.pop(share_id, None)
+                _manifest_gzip_cache.pop(share_id, None)
+            if expired:
+                logger.info("Purged %s expired shares", len(expired))
+        except Exception as e:
+            logger.error("Failed to purge expired shares: %s", e)
+        await asyncio.sleep(PURGE_INTERVAL)
+
 # JWT authentication
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -126,37 +371,111 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+# Verified token payloads, keyed by token digest, so repeat requests skip jwt.decode
+_jwt_cache: TTLCache = TTLCache(maxsize=4096, ttl=30)
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _jwt_cache.get(key)
+    if cached and cached["exp"] > time.time():
+        return cached["sub"]
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None or username != ADMIN_USERNAME:
             raise credentials_exception
+        _jwt_cache[key] = {"sub": username, "exp": payload["exp"]}
         return username
     except JWTError:
         raise credentials_exception
 
-# Generate unique share ID
+# Generate unique share ID: a millisecond timestamp prefix keeps new keys close together
+# in the share_id index, followed by SHARE_ID_LENGTH random bytes
 def generate_share_id():
-    return secrets.token_urlsafe(SHARE_ID_LENGTH)
+    prefix = struct.pack(">Q", time.time_ns() // 1_000_000)[-6:]
+    return base64.urlsafe_b64encode(prefix + os.urandom(SHARE_ID_LENGTH)).rstrip(b"=").decode()
+
+# Rewritten playlists by share_id, stored with the mtime of their file in SHARES_DIR. The files
+# survive restarts and are shared between workers; the mtime tells a worker its copy is stale.
+_manifest_cache: dict[str, tuple[int, bytes]] = {}
+
+# Gzipped playlists, compressed on first request and keyed by the same mtime as _manifest_cache
+_manifest_gzip_cache: dict[str, tuple[int, bytes]] = {}
+MANIFEST_GZIP_MIN_SIZE = 512
+
+def cache_manifest(share_id: str, mtime_ns: int, playlist: bytes):
+    _manifest_cache[share_id] = (mtime_ns, playlist)
+
+def read_manifest(m3u8_path: Path) -> tuple[int, bytes]:
+    # Take the mtime from the open file before reading so it always describes the bytes returned
+    with m3u8_path.open("rb") as f:
+        mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        return mtime_ns, f.read()
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    # An explicit gzip entry wins over "*"; either is refused with q=0
+    wildcard = False
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        if coding == "gzip":
+            return q > 0
+        if coding == "*":
+            wildcard = q > 0
+    return wildcard
+
+def gzip_manifest(share_id: str, mtime_ns: int, playlist: bytes) -> bytes:
+    cached = _manifest_gzip_cache.get(share_id)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    compressed = gzip.compress(playlist, mtime=0)
+    _manifest_gzip_cache[share_id] = (mtime_ns, compressed)
+    return compressed
+
+def write_manifest(m3u8_path: Path, playlist: bytes) -> int:
+    # Write a temp file and rename it into place, so readers only ever see a whole playlist
+    fd, tmp_path = tempfile.mkstemp(dir=m3u8_path.parent, prefix=f".{m3u8_path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            os.fchmod(f.fileno(), 0o644)
+            f.write(playlist)
+            f.flush()
+            mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        os.replace(tmp_path, m3u8_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return mtime_ns
+
+def load_manifest_cache():
+    for m3u8_path in SHARES_DIR.glob("*.m3u8"):
+        cache_manifest(m3u8_path.stem, *read_manifest(m3u8_path))
+    logger.info("Loaded %s .m3u8 files into memory", len(_manifest_cache))
 
 # Generate static .m3u8 file
-def generate_m3u8_file(share_id: str, stash_video_id: int, resolution: str):
+async def generate_m3u8_file(share_id: str, stash_video_id: int, resolution: str):
     stash_url = f"{STASH_SERVER}/scene/{stash_video_id}/stream.m3u8?apikey={STASH_API_KEY}&resolution={resolution}"
     try:
-        response = requests.get(stash_url)
+        response = await app.state.http.get(stash_url, timeout=STASH_API_TIMEOUT)
         if response.status_code != 200:
-            logger.error(f"Failed to fetch .m3u8 from Stash: status={response.status_code}, url={stash_url}")
+            logger.error("Failed to fetch .m3u8 from Stash: status=%s, url=%s", response.status_code, stash_url)
             raise Exception(f"Failed to fetch .m3u8: status={response.status_code}")
         
         # Verify response is a valid .m3u8 playlist
         if not response.text.startswith("#EXTM3U"):
-            logger.error(f"Invalid .m3u8 content from Stash: {response.text[:100]}")
+            logger.error("Invalid .m3u8 content from Stash: %s", response.text[:100])
             raise Exception("Invalid .m3u8 content")
         
         # Parse and rewrite .m3u8 playlist
@@ -170,14 +489,15 @@ def generate_m3u8_file(share_id: str, stash_video_id: int, resolution: str):
             else:
                 rewritten_lines.append(line)
         
-        # Save rewritten .m3u8 file
+        # Save rewritten .m3u8 file off the event loop so streams in flight aren't stalled by disk I/O
+        playlist = ("\n".join(rewritten_lines) + "\n").encode()
         m3u8_path = SHARES_DIR / f"{share_id}.m3u8"
-        with open(m3u8_path, "w") as f:
-            f.write("\n".join(rewritten_lines) + "\n")
-        logger.info(f"Generated .m3u8 file for share_id={share_id} at {m3u8_path}")
+        mtime_ns = await asyncio.to_thread(write_manifest, m3u8_path, playlist)
+        cache_manifest(share_id, mtime_ns, playlist)
+        logger.info("Generated .m3u8 file for share_id=%s at %s", share_id, m3u8_path)
         return True
     except Exception as e:
-        logger.error(f"Error generating .m3u8 file for share_id={share_id}: {e}")
+        logger.error("Error generating .m3u8 file for share_id=%s: %s", share_id, e)
         return False
 
 # Root redirect to admin panel
@@ -188,38 +508,63 @@ async def root():
 # Login endpoint
 @app.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    logger.debug(f"Login attempt: username={form_data.username}")
+    logger.debug("Login attempt: username=%s", form_data.username)
     try:
         if not form_data.username or not form_data.password:
             logger.warning("Missing username or password in login request")
             raise HTTPException(status_code=422, detail="Username and password are required")
-        if form_data.username != ADMIN_USERNAME:
-            logger.warning(f"Invalid username: {form_data.username}")
+        if not hmac.compare_digest(form_data.username.encode(), ADMIN_USERNAME.encode()):
+            logger.warning("Invalid username: %s", form_data.username)
             raise HTTPException(status_code=401, detail="Incorrect username or password")
-        if not pwd_context.verify(form_data.password, HASHED_ADMIN_PASSWORD):
+        if not await verify_admin_password(form_data.password):
             logger.warning("Password verification failed")
             raise HTTPException(status_code=401, detail="Incorrect username or password")
         access_token = create_access_token(data={"sub": form_data.username})
-        logger.info(f"Login successful for username={form_data.username}")
+        logger.info("Login successful for username=%s", form_data.username)
         return {"access_token": access_token, "token_type": "bearer"}
     except HTTPException as http_exc:
-        logger.warning(f"Login HTTP exception: {http_exc.detail}")
+        logger.warning("Login HTTP exception: %s", http_exc.detail)
         raise http_exc
     except Exception as e:
-        logger.error(f"Login error: {e}")
+        logger.error("Login error: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+# Share writes run in a worker thread via asyncio.to_thread so SQLite commits don't block streaming;
+# the caches are still updated by the calling coroutine on the event loop thread
+def insert_share(db: Session, shared_video: SharedVideo):
+    db.add(shared_video)
+    db.commit()
+
+def update_share(db: Session, share_id: str, video_name: str, expires_at: datetime.datetime,
+                 resolution: str, password_hash: str | None) -> int | None:
+    video = db.execute(_share_by_id_stmt, {"sid": share_id}).scalar_one_or_none()
+    if not video:
+        return None
+    video.video_name = video_name
+    video.expires_at = expires_at
+    video.resolution = resolution
+    video.password_hash = password_hash
+    db.commit()
+    return video.stash_video_id
+
+def delete_share_row(db: Session, share_id: str) -> bool:
+    video = db.execute(_share_by_id_stmt, {"sid": share_id}).scalar_one_or_none()
+    if not video:
+        return False
+    db.delete(video)
+    db.commit()
+    return True
+
 # Share a video
 @app.post("/share")
-async def share_video(request: ShareVideoRequest, current_user: str = Depends(get_current_user)):
+async def share_video(request: ShareVideoRequest, current_user: str = Depends(get_current_user), db: Session = Depends(get_db)):
     share_id = generate_share_id()
     expires_at = datetime.datetime.now(timezone.utc) + datetime.timedelta(days=request.days_valid)
     
-    db = SessionLocal()
     try:
         password_hash = None
         if request.password:
-            password_hash = pwd_context.hash(request.password)
+            password_hash = await hash_password(request.password)
         
         shared_video = SharedVideo(
             share_id=share_id,
@@ -230,308 +575,368 @@ async def share_video(request: ShareVideoRequest, current_user: str = Depends(ge
             resolution=request.resolution,
             password_hash=password_hash
         )
-        db.add(shared_video)
-        db.commit()
+        await asyncio.to_thread(insert_share, db, shared_video)
         
         # Generate static .m3u8 file
-        if not generate_m3u8_file(share_id, request.stash_video_id, request.resolution):
+        if not await generate_m3u8_file(share_id, request.stash_video_id, request.resolution):
             raise HTTPException(status_code=500, detail="Failed to generate .m3u8 file")
         
-        logger.info(f"Video shared: share_id={share_id}, stash_video_id={request.stash_video_id}, resolution={request.resolution}")
+        logger.info("Video shared: share_id=%s, stash_video_id=%s, resolution=%s", share_id, request.stash_video_id, request.resolution)
         share_url = f"{BASE_DOMAIN}/share/{share_id}"
         return {"share_url": share_url}
     except Exception as e:
-        logger.error(f"Error sharing video: {e}")
+        logger.error("Error sharing video: %s", e)
         raise HTTPException(status_code=500, detail="Failed to share video")
-    finally:
-        db.close()
 
 # Edit a share
 @app.put("/edit_share/{share_id}")
-async def edit_share(share_id: str, request: ShareVideoRequest, current_user: str = Depends(get_current_user)):
-    db = SessionLocal()
+async def edit_share(share_id: str, request: ShareVideoRequest, current_user: str = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        video = db.query(SharedVideo).filter(SharedVideo.share_id == share_id).first()
-        if not video:
+        password_hash = await hash_password(request.password) if request.password else None
+        expires_at = datetime.datetime.now(timezone.utc) + datetime.timedelta(days=request.days_valid)
+        stash_video_id = await asyncio.to_thread(
+            update_share, db, share_id, request.video_name, expires_at, request.resolution, password_hash
+        )
+        if stash_video_id is None:
             raise HTTPException(status_code=404, detail="Share link not found")
-        video.video_name = request.video_name
-        video.expires_at = datetime.datetime.now(timezone.utc) + datetime.timedelta(days=request.days_valid)
-        video.resolution = request.resolution
-        if request.password:
-            video.password_hash = pwd_context.hash(request.password)
-        else:
-            video.password_hash = None
-        db.commit()
+        _share_cache.pop(share_id, None)
         
         # Regenerate .m3u8 file
-        if not generate_m3u8_file(share_id, request.stash_video_id, request.resolution):
+        if not await generate_m3u8_file(share_id, stash_video_id, request.resolution):
             raise HTTPException(status_code=500, detail="Failed to regenerate .m3u8 file")
         
-        logger.info(f"Share updated: share_id={share_id}")
+        logger.info("Share updated: share_id=%s", share_id)
         return {"message": "Share updated"}
     except Exception as e:
-        logger.error(f"Error updating share: {e}")
+        logger.error("Error updating share: %s", e)
         raise HTTPException(status_code=500, detail="Failed to update share")
-    finally:
-        db.close()
 
 # Delete a share
 @app.delete("/delete_share/{share_id}")
-async def delete_share(share_id: str, current_user: str = Depends(get_current_user)):
-    db = SessionLocal()
+async def delete_share(share_id: str, current_user: str = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
-        video = db.query(SharedVideo).filter(SharedVideo.share_id == share_id).first()
-        if not video:
+        if not await asyncio.to_thread(delete_share_row, db, share_id):
             raise HTTPException(status_code=404, detail="Share link not found")
-        db.delete(video)
-        db.commit()
+        _share_cache.pop(share_id, None)
+        _manifest_cache.pop(share_id, None)
+        _manifest_gzip_cache.pop(share_id, None)
         
         # Delete .m3u8 file
         m3u8_path = SHARES_DIR / f"{share_id}.m3u8"
         if m3u8_path.exists():
             m3u8_path.unlink()
-            logger.info(f"Deleted .m3u8 file for share_id={share_id}")
+            logger.info("Deleted .m3u8 file for share_id=%s", share_id)
         
-        logger.info(f"Share deleted: share_id={share_id}")
+        logger.info("Share deleted: share_id=%s", share_id)
         return {"message": "Share deleted"}
     except Exception as e:
-        logger.error(f"Error deleting share: {e}")
+        logger.error("Error deleting share: %s", e)
         raise HTTPException(status_code=500, detail="Failed to delete share")
-    finally:
-        db.close()
+
+# Player page markup, parsed once at import
+SHARE_PAGE_TEMPLATE = string.Template("""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>$video_name</title>
+        <link href="/static/styles.css" rel="stylesheet">
+        <link href="https://vjs.zencdn.net/8.10.0/video-js.css" rel="stylesheet">
+    </head>
+    <body>
+        <div class="container">
+            <img src="/static/logo-placeholder.png" alt="Logo" class="logo">
+            <div class="video-container">
+                <video id="video-player" class="video-js vjs-default-skin" controls preload="auto" width="800">
+                    <source src="/share/$share_id/stream.m3u8" type="application/x-mpegURL">
+                    Your browser does not support the video tag.
+                </video>
+            </div>
+            <p class="disclaimer">$disclaimer</p>
+        </div>
+        <script src="https://vjs.zencdn.net/8.10.0/video.min.js"></script>
+        <script src="https://cdn.jsdelivr.net/npm/hls.js@latest"></script>
+        <script>
+            var video = document.getElementById('video-player');
+            var player = videojs('video-player', {
+                playbackRates: [0.5, 1, 1.5, 2]
+            });
+            var src = '/share/$share_id/stream.m3u8';
+            if (Hls.isSupported()) {
+                var hls = new Hls();
+                hls.loadSource(src);
+                hls.attachMedia(video);
+            } else if (video.canPlayType('application/vnd.apple.mpegurl')) {
+                video.src = src;
+            }
+        </script>
+    </body>
+    </html>
+    """)
+
+# Render the player page for a share; it only depends on its arguments, so the bytes are memoised
+@lru_cache(maxsize=4096)
+def render_share_page(share_id: str, video_name: str) -> bytes:
+    return SHARE_PAGE_TEMPLATE.substitute(
+        video_name=html.escape(video_name),
+        share_id=share_id,
+        disclaimer=DISCLAIMER,
+    ).encode()
+
+# Password prompt markup, parsed once at import
+PASSWORD_PAGE_TEMPLATE = string.Template("""
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Enter Password</title>
+        <link href="/static/styles.css" rel="stylesheet">
+    </head>
+    <body>
+        <div class="container">
+            <h2>Enter Password for $video_name</h2>
+            <form action="/share/$share_id/verify" method="post">
+                <input type="password" name="password" placeholder="Password" required>
+                <button type="submit">Submit</button>
+            </form>
+        </div>
+    </body>
+    </html>
+    """)
+
+# Render the password prompt for a protected share; memoised like the player page
+@lru_cache(maxsize=4096)
+def render_password_page(share_id: str, video_name: str) -> bytes:
+    return PASSWORD_PAGE_TEMPLATE.substitute(
+        video_name=html.escape(video_name),
+        share_id=share_id,
+    ).encode()
 
 # Stream video via share link
 @app.get("/share/{share_id}", response_class=HTMLResponse)
-async def stream_shared_video(share_id: str, password_verified: bool = False):
-    db = SessionLocal()
+async def stream_shared_video(share_id: str, password_verified: bool = False, db: Session = Depends(get_db)):
     try:
-        video = db.query(SharedVideo).filter(SharedVideo.share_id == share_id).first()
+        video = get_share(db, share_id)
         if not video:
             raise HTTPException(status_code=404, detail="Share link not found")
-        expires_at_aware = video.expires_at.replace(tzinfo=timezone.utc)
-        if expires_at_aware < datetime.datetime.now(timezone.utc):
+        if video.expires_at < time.time():
             raise HTTPException(status_code=403, detail="Share link has expired")
         
         # Check if password is required
         if video.password_hash and not password_verified:
-            return HTMLResponse(content=f"""
-            <!DOCTYPE html>
-            <html lang="en">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Enter Password</title>
-                <link href="/static/styles.css" rel="stylesheet">
-            </head>
-            <body>
-                <div class="container">
-                    <h2>Enter Password for {video.video_name}</h2>
-                    <form action="/share/{share_id}/verify" method="post">
-                        <input type="password" name="password" placeholder="Password" required>
-                        <button type="submit">Submit</button>
-                    </form>
-                </div>
-            </body>
-            </html>
-            """)
+            return HTMLResponse(content=render_password_page(share_id, video.video_name))
         
-        video.hits += 1
-        db.commit()
-        logger.info(f"Video streamed: share_id={share_id}, hits={video.hits}")
+        async with _hit_lock:
+            _hit_buffer[share_id] += 1
+        logger.info("Video streamed: share_id=%s", share_id)
         
-        html_content = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{video.video_name}</title>
-            <link href="/static/styles.css" rel="stylesheet">
-            <link href="https://vjs.zencdn.net/8.10.0/video-js.css" rel="stylesheet">
-        </head>
-        <body>
-            <div class="container">
-                <img src="/static/logo-placeholder.png" alt="Logo" class="logo">
-                <div class="video-container">
-                    <video id="video-player" class="video-js vjs-default-skin" controls preload="auto" width="800">
-                        <source src="/share/{share_id}/stream.m3u8" type="application/x-mpegURL">
-                        Your browser does not support the video tag.
-                    </video>
-                </div>
-                <p class="disclaimer">{DISCLAIMER}</p>
-            </div>
-            <script src="https://vjs.zencdn.net/8.10.0/video.min.js"></script>
-            <script src="https://cdn.jsdelivr.net/npm/hls.js@latest"></script>
-            <script>
-                var video = document.getElementById('video-player');
-                var player = videojs('video-player', {{
-                    playbackRates: [0.5, 1, 1.5, 2]
-                }});
-                var src = '/share/{share_id}/stream.m3u8';
-                if (Hls.isSupported()) {{
-                    var hls = new Hls();
-                    hls.loadSource(src);
-                    hls.attachMedia(video);
-                }} else if (video.canPlayType('application/vnd.apple.mpegurl')) {{
-                    video.src = src;
-                }}
-            </script>
-        </body>
-        </html>
-        """
-        return HTMLResponse(content=html_content)
+        return HTMLResponse(content=render_share_page(share_id, video.video_name))
     except Exception as e:
-        logger.error(f"Error streaming video: {e}")
+        logger.error("Error streaming video: %s", e)
         raise HTTPException(status_code=500, detail="Failed to stream video")
-    finally:
-        db.close()
 
 # Verify password for share
 @app.post("/share/{share_id}/verify", response_class=HTMLResponse)
-async def verify_share_password(share_id: str, password: str = Form(...)):
-    db = SessionLocal()
+async def verify_share_password(share_id: str, password: str = Form(...), db: Session = Depends(get_db)):
     try:
-        video = db.query(SharedVideo).filter(SharedVideo.share_id == share_id).first()
+        video = get_share(db, share_id)
         if not video:
             raise HTTPException(status_code=404, detail="Share link not found")
-        if not video.password_hash or not pwd_context.verify(password, video.password_hash):
+        if not video.password_hash or not await verify_password(password, video.password_hash):
             raise HTTPException(status_code=401, detail="Incorrect password")
         
         # Redirect to video page with verification
         return RedirectResponse(url=f"/share/{share_id}?password_verified=true", status_code=303)
     except HTTPException as http_exc:
-        logger.warning(f"Password verification failed: {http_exc.detail}")
+        logger.warning("Password verification failed: %s", http_exc.detail)
         raise http_exc
     except Exception as e:
-        logger.error(f"Error verifying password: {e}")
+        logger.error("Error verifying password: %s", e)
         raise HTTPException(status_code=500, detail="Failed to verify password")
-    finally:
-        db.close()
 
 # Serve static .m3u8 file
 @app.get("/share/{share_id}/stream.m3u8")
-async def serve_m3u8_file(share_id: str):
-    db = SessionLocal()
+async def serve_m3u8_file(share_id: str, request: Request, db: Session = Depends(get_db)):
     try:
-        video = db.query(SharedVideo).filter(SharedVideo.share_id == share_id).first()
+        video = get_share(db, share_id)
         if not video:
             raise HTTPException(status_code=404, detail="Share link not found")
-        expires_at_aware = video.expires_at.replace(tzinfo=timezone.utc)
-        if expires_at_aware < datetime.datetime.now(timezone.utc):
+        if video.expires_at < time.time():
             raise HTTPException(status_code=403, detail="Share link has expired")
         
         m3u8_path = SHARES_DIR / f"{share_id}.m3u8"
         if not m3u8_path.exists():
-            logger.warning(f".m3u8 file not found for share_id={share_id}, attempting to regenerate")
-            if not generate_m3u8_file(share_id, video.stash_video_id, video.resolution):
-                logger.error(f"Failed to regenerate .m3u8 file for share_id={share_id}")
+            # Another worker may have deleted the share; confirm the row before refetching from Stash
+            _share_cache.pop(share_id, None)
+            video = get_share(db, share_id)
+            if not video:
+                raise HTTPException(status_code=404, detail="Share link not found")
+            logger.warning(".m3u8 file not found for share_id=%s, attempting to regenerate", share_id)
+            if not await generate_m3u8_file(share_id, video.stash_video_id, video.resolution):
+                logger.error("Failed to regenerate .m3u8 file for share_id=%s", share_id)
                 raise HTTPException(status_code=500, detail="Failed to regenerate .m3u8 file")
         
-        return FileResponse(
-            m3u8_path,
+        # A stat is enough to confirm the cached copy is current; reread only if the file changed
+        cached = _manifest_cache.get(share_id)
+        if cached and cached[0] == m3u8_path.stat().st_mtime_ns:
+            mtime_ns, playlist = cached
+        else:
+            mtime_ns, playlist = read_manifest(m3u8_path)
+            cache_manifest(share_id, mtime_ns, playlist)
+        
+        headers = {
+            "Access-Control-Allow-Origin": "*",
+            "Cache-Control": "public, max-age=10",
+            "Vary": "Accept-Encoding"
+        }
+        # Playlists are repetitive text and compress well; segments are never compressed
+        if len(playlist) >= MANIFEST_GZIP_MIN_SIZE and accepts_gzip(request.headers.get("accept-encoding", "")):
+            playlist = gzip_manifest(share_id, mtime_ns, playlist)
+            headers["Content-Encoding"] = "gzip"
+        
+        return Response(
+            content=playlist,
             media_type="application/x-mpegURL",
-            headers={
-                "Access-Control-Allow-Origin": "*",
-                "Cache-Control": "public, max-age=10"
-            }
+            headers=headers
         )
     except Exception as e:
-        logger.error(f"Error serving .m3u8 file: {e}")
+        logger.error("Error serving .m3u8 file: %s", e)
         raise HTTPException(status_code=500, detail="Failed to serve .m3u8 file")
-    finally:
-        db.close()
 
 # Proxy HLS segments (.ts files)
 @app.get("/share/{share_id}/stream/{segment}")
-async def proxy_hls_segment(share_id: str, segment: str):
-    db = SessionLocal()
+async def proxy_hls_segment(share_id: str, segment: str, request: Request, db: Session = Depends(get_db)):
     try:
-        video = db.query(SharedVideo).filter(SharedVideo.share_id == share_id).first()
+        video = get_share(db, share_id)
         if not video:
             raise HTTPException(status_code=404, detail="Share link not found")
-        expires_at_aware = video.expires_at.replace(tzinfo=timezone.utc)
-        if expires_at_aware < datetime.datetime.now(timezone.utc):
+        if video.expires_at < time.time():
             raise HTTPException(status_code=403, detail="Share link has expired")
         
         # Construct Stash segment URL
-        stash_url = f"{STASH_SERVER}/scene/{video.stash_video_id}/stream.m3u8/{segment}?apikey={STASH_API_KEY}&resolution={video.resolution}"
-        response = requests.get(stash_url, stream=True)
-        if response.status_code != 200:
-            logger.error(f"Failed to fetch HLS segment from Stash: status={response.status_code}, url={stash_url}")
-            raise HTTPException(status_code=500, detail="Failed to fetch HLS segment from Stash")
-        
-        logger.debug(f"Proxied .ts segment for share_id={share_id}, segment={segment}")
-        def stream_content():
-            for chunk in response.iter_content(chunk_size=2048*1024):
-                if chunk:
-                    yield chunk
-        
-        return StreamingResponse(
-            stream_content(),
-            media_type="video/mp2t",
-            headers={
-                "Content-Length": response.headers.get("Content-Length"),
+        stash_url = video.segment_url_prefix + segment + video.segment_url_query
+        # Forward the player's Range and conditional headers so seeks fetch only the requested bytes
+        request_headers = request.headers
+        upstream_headers = {name: request_headers[name] for name in SEGMENT_FORWARD_HEADERS if name in request_headers}
+        # Bodies are relayed raw, so ask Stash not to compress them; Content-Encoding isn't passed through
+        upstream_headers["Accept-Encoding"] = "identity"
+        client = app.state.http
+        response = await client.send(client.build_request("GET", stash_url, headers=upstream_headers), stream=True)
+        # Until stream_content takes ownership, any failure must hand the pooled connection back
+        try:
+            if response.status_code not in (200, 206, 304, 416):
+                logger.error("Failed to fetch HLS segment from Stash: status=%s, url=%s", response.status_code, stash_url)
+                raise HTTPException(status_code=500, detail="Failed to fetch HLS segment from Stash")
+            
+            headers = {
                 "Accept-Ranges": "bytes",
                 "Access-Control-Allow-Origin": "*",
                 "Cache-Control": "public, max-age=3600"
             }
-        )
+            for name in SEGMENT_PASSTHROUGH_HEADERS:
+                if name in response.headers:
+                    headers[name] = response.headers[name]
+            
+            # Tiny bodies (304s, 416s for ranges past the end, short range tails) cost more to stream than to buffer
+            content_length = parse_content_length(response.headers.get("Content-Length"))
+            if content_length is None:
+                # Don't relay a length header the viewer couldn't trust either
+                headers.pop("Content-Length", None)
+            if response.status_code in (304, 416) or (content_length is not None and content_length < SMALL_BODY_SIZE):
+                try:
+                    body = b"".join([chunk async for chunk in response.aiter_raw()])
+                finally:
+                    await response.aclose()
+                return Response(content=body, status_code=response.status_code, media_type="video/mp2t", headers=headers)
+            
+            # Read ahead from Stash into a bounded queue while the client drains it,
+            # so upstream reads overlap with downstream writes
+            queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_PREFETCH_CHUNKS)
+            
+            async def produce():
+                try:
+                    async for chunk in response.aiter_raw(STREAM_CHUNK_SIZE):
+                        await queue.put(chunk)
+                    await queue.put(None)
+                except Exception as e:
+                    await queue.put(e)
+                finally:
+                    await response.aclose()
+            
+            async def stream_content():
+                producer = asyncio.create_task(produce())
+                try:
+                    while (chunk := await queue.get()) is not None:
+                        if isinstance(chunk, Exception):
+                            raise chunk
+                        yield chunk
+                finally:
+                    producer.cancel()
+            
+            return StreamingResponse(
+                stream_content(),
+                status_code=response.status_code,
+                media_type="video/mp2t",
+                headers=headers
+            )
+        except BaseException:
+            await response.aclose()
+            raise
     except Exception as e:
-        logger.error(f"Error proxying HLS segment: {e}")
+        logger.error("Error proxying HLS segment: %s", e)
         raise HTTPException(status_code=500, detail="Failed to proxy HLS segment")
-    finally:
-        db.close()
+
+# Stash GraphQL endpoint, headers and scene title query; only the scene ID varies per call
+STASH_GRAPHQL_URL = f"{STASH_SERVER}/graphql"
+STASH_GRAPHQL_HEADERS = {
+    "ApiKey": STASH_API_KEY,
+    "Content-Type": "application/json"
+}
+FIND_SCENE_TITLE_QUERY = """
+    query FindScene($id: ID!) {
+        findScene(id: $id) {
+            title
+        }
+    }
+"""
 
 # Get video title from Stash
 @app.get("/get_video_title/{stash_id}")
 async def get_video_title(stash_id: int, current_user: str = Depends(get_current_user)):
-    stash_graphql_url = f"{STASH_SERVER}/graphql"
-    headers = {
-        "ApiKey": STASH_API_KEY,
-        "Content-Type": "application/json"
-    }
-    query = {
-        "query": """
-            query FindScene($id: ID!) {
-                findScene(id: $id) {
-                    title
-                }
-            }
-        """,
-        "variables": {"id": str(stash_id)}
-    }
+    query = {"query": FIND_SCENE_TITLE_QUERY, "variables": {"id": str(stash_id)}}
 
-    logger.debug(f"Querying Stash for title of scene ID: {stash_id}")
+    logger.debug("Querying Stash for title of scene ID: %s", stash_id)
     try:
-        response = requests.post(stash_graphql_url, json=query, headers=headers)
+        response = await app.state.http.post(STASH_GRAPHQL_URL, json=query, headers=STASH_GRAPHQL_HEADERS, timeout=STASH_API_TIMEOUT)
         response.raise_for_status()
         data = response.json()
 
         if data.get("errors"):
-            logger.error(f"GraphQL error from Stash: {data['errors']}")
+            logger.error("GraphQL error from Stash: %s", data['errors'])
             raise HTTPException(status_code=500, detail="GraphQL error from Stash")
 
         scene_data = data.get("data", {}).get("findScene")
         if scene_data and scene_data.get("title"):
-            logger.info(f"Found title for Stash ID {stash_id}: {scene_data['title']}")
+            logger.info("Found title for Stash ID %s: %s", stash_id, scene_data['title'])
             return {"title": scene_data["title"]}
         else:
-            logger.warning(f"Scene not found or title missing for Stash ID: {stash_id}")
+            logger.warning("Scene not found or title missing for Stash ID: %s", stash_id)
             raise HTTPException(status_code=404, detail="Scene not found in Stash")
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error connecting to Stash GraphQL API: {e}")
+    except httpx.HTTPError as e:
+        logger.error("Error connecting to Stash GraphQL API: %s", e)
         raise HTTPException(status_code=503, detail="Could not connect to Stash API")
     except Exception as e:
-        logger.error(f"Error fetching video title for ID {stash_id}: {e}")
+        logger.error("Error fetching video title for ID %s: %s", stash_id, e)
         raise HTTPException(status_code=500, detail="Internal server error fetching video title")
 
 # List shared videos
-@app.get("/shared_videos")
-async def shared_videos(current_user: str = Depends(get_current_user)):
-    db = SessionLocal()
+@app.get("/shared_videos", response_model=list[SharedVideoInfo])
+def shared_videos(current_user: str = Depends(get_current_user), db: Session = Depends(get_db)):
     try:
         videos = db.query(SharedVideo).all()
-        logger.info(f"Retrieved {len(videos)} shared videos")
+        logger.info("Retrieved %s shared videos", len(videos))
         result = []
         for v in videos:
             share_url = f"{BASE_DOMAIN}/share/{v.share_id}"
@@ -541,7 +946,7 @@ async def shared_videos(current_user: str = Depends(get_current_user)):
                     "video_name": f"{v.video_name} ({v.resolution})",
                     "stash_video_id": v.stash_video_id,
                     "expires_at": v.expires_at,
-                    "hits": v.hits,
+                    "hits": v.hits + _hit_buffer[v.share_id],
                     "share_url": share_url,
                     "resolution": v.resolution,
                     "has_password": v.password_hash is not None
@@ -549,11 +954,21 @@ async def shared_videos(current_user: str = Depends(get_current_user)):
             )
         return result
     except Exception as e:
-        logger.error(f"Error listing shared videos: {e}")
+        logger.error("Error listing shared videos: %s", e)
         raise HTTPException(status_code=500, detail="Failed to list shared videos")
-    finally:
-        db.close()
 
 # Run Uvicorn server
 if __name__ == "__main__":
-    uvicorn.run(app, host=KINPEEK_HOST, port=KINPEEK_PORT)
+    if KINPEEK_WORKERS > 1:
+        os.environ.setdefault("KINPEEK_SECRET_KEY", SECRET_KEY)
+        init_db()
+        os.environ["KINPEEK_DB_READY"] = "1"
+    # uvicorn picks uvloop and httptools automatically when they are installed
+    uvicorn.run(
+        "kinpeek:app",
+        host=KINPEEK_HOST,
+        port=KINPEEK_PORT,
+        workers=KINPEEK_WORKERS,
+        log_level="info",
+        access_log=False,
+    )